@@ -1,7 +1,7 @@
 # AI Agent package for RupeeQ AI Calling Agent
 
-from .conversation import ConversationManager
-from .speech_engine import SpeechEngine
+# Submodules are imported lazily (PEP 562) so that pulling in the lightweight
+# ConversationManager does not load the audio stack (PortAudio, TTS drivers)
 
 __all__ = [
     'ConversationManager',
@@ -15,5 +15,11 @@ __version__ = '0.1.0'
 __author__ = 'RupeeQ Team'
 __description__ = 'AI Agent for automated calling and conversation management'
 
-
-
+def __getattr__(name):
+    if name == 'ConversationManager':
+        from .conversation import ConversationManager
+        return ConversationManager
+    if name == 'SpeechEngine':
+        from .speech_engine import SpeechEngine
+        return SpeechEngine
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,41 +3,231 @@
 RupeeQ AI Calling Agent - Main Flask Application
 """
 
+import eventlet
+# Patch the standard library before anything else imports it so blocking
+# socket/requests calls cooperate with the eventlet event loop
+eventlet.monkey_patch()
+
+from eventlet import tpool
+
+# Real (unpatched) queue class for handing recognized speech from the
+# engine's OS threads back to green context; green queues are not safe to
+# touch from foreign real threads
+_original_queue = eventlet.patcher.original('queue')
+
+import itertools
 import os
-import sqlite3
 import json
+import queue
 import threading
 import time
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from flask import Flask, render_template, request, jsonify, send_file
+import orjson
+from flask import Flask, render_template, request, jsonify, send_file, Response, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flask_socketio import SocketIO, emit, join_room, leave_room
 from werkzeug.utils import secure_filename
 import csv
-import io
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Any
 
 # Import our modules
 from ai_agent.speech_engine import SpeechEngine
 from ai_agent.conversation import ConversationManager
-# AFTER (the correct version)
-from database import init_db, Call, CallTranscript
+from database import DatabaseManager, Call, Transcript, engine
+from sqlalchemy import text
+
+class ORJSONProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson's C serializer"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 # Initialize Flask app
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'rupeeq_ai_secret_key_2024'
 app.config['UPLOAD_FOLDER'] = 'uploads'
+app.json = ORJSONProvider(app)
+
+class _OrjsonPackets:
+    """json-module facade over orjson for socketio packet encoding"""
+
+    @staticmethod
+    def dumps(obj, *args, **kwargs):
+        return orjson.dumps(obj).decode()
+
+    @staticmethod
+    def loads(s, *args, **kwargs):
+        return orjson.loads(s)
 
 # Initialize SocketIO
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode='eventlet',
+                    json=_OrjsonPackets)
+
+# Active sessions: one record per connected call instead of three parallel
+# dicts, so handlers do a single lookup per event
+@dataclass(slots=True)
+class Session:
+    call_id: int
+    customer_name: str
+    agent_name: str
+    language: str
+    text_mode: bool
+    start_time: datetime
+    status: str
+    speech_engine: SpeechEngine
+    conversation: ConversationManager
+    pending_tts: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    # Recognized phrases cross from the engine's OS threads into the green
+    # pump through this plain stdlib queue
+    speech_queue: Any = field(default_factory=_original_queue.SimpleQueue)
+
+sessions: Dict[str, Session] = {}
+sessions_lock = threading.Lock()  # guards insert/delete only
+
+# TTS fan-out goes through one bounded pool instead of a task per response,
+# and a per-session backlog cap drops speech that would only arrive late.
+# Post-monkey-patch the pool workers are greenlets, so the blocking speak
+# itself crosses into tpool's native threads and only the green worker waits
+tts_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='tts')
+_TTS_MAX_PENDING = 3
+
+def _run_tts(session, message):
+    try:
+        tpool.execute(session.speech_engine.speak, message)
+    finally:
+        with session.lock:
+            session.pending_tts -= 1
+
+def submit_tts(session, message):
+    """Queue speech on the TTS pool, skipping if the session is backlogged"""
+    with session.lock:
+        if session.pending_tts >= _TTS_MAX_PENDING:
+            return
+        session.pending_tts += 1
+    tts_pool.submit(_run_tts, session, message)
 
-# Global variables for active sessions
-active_calls = {}
-speech_engines = {}
-conversation_managers = {}
+def _pump_recognized_speech(session_id, session):
+    """Relay recognized phrases from the speech engine to the client
+
+    The engine invokes its callback on a real OS thread, where green
+    socketio primitives are off limits; text lands on the session's plain
+    queue instead, and this green task blocks in tpool for the next phrase
+    and emits from hub context. A None from end_call shuts the pump down.
+    """
+    while True:
+        text = tpool.execute(session.speech_queue.get)
+        if text is None:
+            break
+        if text:
+            socketio.emit('user_message', {'message': text}, room=session_id)
 
 # Initialize database manager
 db_manager = DatabaseManager()
 
+# DB writes are queued here — transcript turns as lists, call updates as
+# dicts carrying an 'id' — and committed in batches by a single background
+# writer, so socket handlers never block on a SQLite commit, a whole turn
+# is always one transaction, and simultaneous hang-ups coalesce into one
+# bulk UPDATE
+write_queue = queue.Queue()
+
+_WRITE_BATCH_SIZE = 50
+_WRITE_FLUSH_INTERVAL = 0.05
+
+def db_writer():
+    """Drain queued DB writes and apply each batch in as few statements as possible"""
+    while True:
+        items = [write_queue.get()]
+        deadline = time.time() + _WRITE_FLUSH_INTERVAL
+        while len(items) < _WRITE_BATCH_SIZE:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                items.append(write_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        transcripts = []
+        call_updates = []
+        for item in items:
+            if isinstance(item, list):
+                transcripts.extend(item)
+            else:
+                call_updates.append(item)
+        try:
+            db_manager.add_transcripts(transcripts)
+            db_manager.update_calls_bulk(call_updates)
+        except Exception as e:
+            print(f"Error writing DB batch: {e}")
+        finally:
+            for _ in items:
+                write_queue.task_done()
+
+socketio.start_background_task(db_writer)
+
+# Pre-baked export statements, one per filter combination, so each request
+# reuses a cached compiled statement instead of rebuilding the SQL string
+_EXPORT_BASE = '''
+    SELECT id, customer_name, agent_name, phone_number, status,
+           outcome, sentiment_score, start_time, end_time,
+           duration, language
+    FROM calls WHERE 1=1
+'''
+_EXPORT_FILTER_CLAUSES = {
+    'start_date': ' AND start_time >= :start_date',
+    'end_date': ' AND start_time < :end_date',
+    'status': ' AND status = :status',
+    'outcome': ' AND outcome = :outcome',
+}
+
+# Rows fetched (and formatted) per streamed CSV chunk; tunable because the
+# sweet spot depends on row width and deployment memory
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '5000'))
+
+class _ChunkSink:
+    """Write target for csv.writer that hands back accumulated chunks
+
+    Lets writerows run its whole inner loop in C while the generator yields
+    one response chunk per partition, without a fresh StringIO per chunk.
+    """
+
+    def __init__(self):
+        self._parts = []
+
+    def write(self, data):
+        self._parts.append(data)
+
+    def drain(self):
+        chunk = ''.join(self._parts)
+        self._parts.clear()
+        return chunk
+
+def _build_export_query(keys):
+    clauses = ''.join(clause for key, clause in _EXPORT_FILTER_CLAUSES.items()
+                      if key in keys)
+    return text(_EXPORT_BASE + clauses + ' ORDER BY start_time DESC')
+
+EXPORT_QUERIES = {
+    frozenset(keys): _build_export_query(keys)
+    for size in range(len(_EXPORT_FILTER_CLAUSES) + 1)
+    for keys in itertools.combinations(_EXPORT_FILTER_CLAUSES, size)
+}
+
+# Dashboard polling: every open tab hits /api/calls every few seconds with
+# the same aggregate query. Cache the built payload for a short TTL so DB
+# load is bounded by the TTL, not by client count; writes invalidate it.
+_DASHBOARD_CACHE_TTL = 2.0
+_dashboard_cache = {'expires': 0.0, 'payload': None}
+
+def _invalidate_dashboard_cache():
+    _dashboard_cache['expires'] = 0.0
+
 # Flask Routes
 @app.route('/')
 def dashboard():
@@ -54,25 +244,37 @@ def ai_agent():
 def get_calls():
     """Get all calls with statistics"""
     try:
-        # Get daily statistics
-        stats = db_manager.get_daily_statistics()
-        
-        # Get active calls count
-        active_calls_count = len(active_calls)
-        
-        # Get recent calls
-        recent_calls_data = db_manager.get_calls(limit=10)
-        recent_calls = []
-        for call in recent_calls_data:
-            recent_calls.append({
-                'id': call.id,
-                'customer_name': call.customer_name,
-                'status': call.status,
-                'duration': call.duration or 0,
-                'start_time': call.start_time,
-                'outcome': call.outcome or 'Unknown',
-                'sentiment_score': call.sentiment_score or 0
-            })
+        if _dashboard_cache['payload'] is None or \
+                time.monotonic() >= _dashboard_cache['expires']:
+            # Fetch today's statistics and the recent-call list in one bundle
+            # (two queries) instead of a stats pass plus a per-call fetch
+            bundle = db_manager.get_dashboard_bundle(limit=10)
+
+            # One grouped projection query gives the latest message per
+            # call; full transcripts never leave the database here
+            last_messages = db_manager.get_last_messages(
+                [call['id'] for call in bundle['recent_calls']])
+
+            recent_calls = []
+            for call in bundle['recent_calls']:
+                recent_calls.append({
+                    'id': call['id'],
+                    'customer_name': call['customer_name'],
+                    'status': call['status'],
+                    'duration': call['duration'] or 0,
+                    'start_time': call['start_time'],
+                    'outcome': call['outcome'] or 'Unknown',
+                    'sentiment_score': call['sentiment_score'] or 0,
+                    'last_message': last_messages.get(call['id'], '')
+                })
+
+            _dashboard_cache['payload'] = (bundle['statistics'], recent_calls)
+            _dashboard_cache['expires'] = time.monotonic() + _DASHBOARD_CACHE_TTL
+
+        stats, recent_calls = _dashboard_cache['payload']
+
+        # Active calls count stays live (it's just a dict length)
+        active_calls_count = len(sessions)
         
         return jsonify({
             'success': True,
@@ -113,7 +315,9 @@ def get_call_details(call_id):
                 'speaker': transcript.speaker,
                 'message': transcript.message,
                 'timestamp': transcript.timestamp,
-                'timestamp_formatted': datetime.fromisoformat(transcript.timestamp).strftime('%H:%M:%S') if transcript.timestamp else ''
+                # ISO-8601 is fixed-layout: slice HH:MM:SS straight out
+                # instead of round-tripping through fromisoformat/strftime
+                'timestamp_formatted': transcript.timestamp[11:19] if transcript.timestamp else ''
             })
         
         call_info = {
@@ -179,59 +383,54 @@ def export_calls():
         data = request.get_json()
         filters = data.get('filters', {})
         
-        conn = sqlite3.connect('rupeeq_ai.db')
-        cursor = conn.cursor()
-        
-        # Build query with filters (similar to filtered calls)
-        query = '''
-            SELECT * FROM calls WHERE 1=1
-        '''
-        params = []
-        
+        params = {}
+
+        # Compare against the raw column (ISO-8601 strings sort correctly)
+        # instead of DATE(start_time) so the start_time indexes stay usable
         if filters.get('start_date'):
-            query += ' AND DATE(start_time) >= ?'
-            params.append(filters['start_date'])
-            
+            params['start_date'] = filters['start_date']
+
         if filters.get('end_date'):
-            query += ' AND DATE(start_time) <= ?'
-            params.append(filters['end_date'])
-            
+            end_date = datetime.strptime(filters['end_date'], '%Y-%m-%d')
+            params['end_date'] = (end_date + timedelta(days=1)).strftime('%Y-%m-%d')
+
         if filters.get('status'):
-            query += ' AND status = ?'
-            params.append(filters['status'])
-            
+            params['status'] = filters['status']
+
         if filters.get('outcome'):
-            query += ' AND outcome = ?'
-            params.append(filters['outcome'])
-        
-        query += ' ORDER BY start_time DESC'
-        
-        cursor.execute(query, params)
-        calls = cursor.fetchall()
-        
-        # Create CSV
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow(['ID', 'Customer Name', 'Agent Name', 'Phone Number', 'Status', 
-                        'Outcome', 'Sentiment Score', 'Start Time', 'End Time', 'Duration', 'Language'])
-        
-        # Write data
-        for call in calls:
-            writer.writerow(call)
-        
-        output.seek(0)
-        
+            params['outcome'] = filters['outcome']
+
+        # Pick the pre-baked statement for this filter combination so
+        # SQLAlchemy reuses its compiled form instead of reparsing per request
+        stmt = EXPORT_QUERIES[frozenset(params)]
+
         # Create filename
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         filename = f'rupeeq_calls_export_{timestamp}.csv'
         
-        return jsonify({
-            'success': True,
-            'data': output.getvalue(),
-            'filename': filename
-        })
+        def generate():
+            # Stream rows straight off a pooled engine connection so memory
+            # stays flat and no per-request sqlite3.connect is paid
+            with engine.connect() as conn:
+                result = conn.execution_options(stream_results=True).execute(
+                    stmt, params)
+
+                sink = _ChunkSink()
+                writer = csv.writer(sink)
+                writer.writerow(['ID', 'Customer Name', 'Agent Name', 'Phone Number', 'Status',
+                                'Outcome', 'Sentiment Score', 'Start Time', 'End Time', 'Duration', 'Language'])
+                yield sink.drain()
+
+                # writerows formats each partition entirely in C
+                for rows in result.partitions(EXPORT_CHUNK_SIZE):
+                    writer.writerows(rows)
+                    yield sink.drain()
+        
+        return Response(
+            stream_with_context(generate()),
+            mimetype='text/csv',
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
+        )
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -247,17 +446,10 @@ def handle_connect():
 def handle_disconnect():
     """Handle client disconnection"""
     print(f"Client disconnected: {request.sid}")
-    
-    # Clean up resources for this session
-    if request.sid in active_calls:
-        end_call_internal(request.sid)
-    
-    if request.sid in speech_engines:
-        speech_engines[request.sid].cleanup()
-        del speech_engines[request.sid]
-    
-    if request.sid in conversation_managers:
-        del conversation_managers[request.sid]
+
+    # Clean up resources for this session; the client is already gone, so
+    # skip the farewell emits (end_call_internal is a no-op for unknown sids)
+    end_call_internal(request.sid, notify=False)
 
 @socketio.on('start_call')
 def handle_start_call(data):
@@ -271,35 +463,45 @@ def handle_start_call(data):
         
         print(f"Starting call for {customer_name} with agent {agent_name}")
         
-        # Initialize speech engine
-        speech_engine = SpeechEngine()
-        speech_engines[session_id] = speech_engine
-        
+        # Initialize speech engine on a native thread: warmup blocks for
+        # driver init plus ambient-noise calibration, which must not stall
+        # the hub
+        speech_engine = tpool.execute(SpeechEngine)
+
         # Initialize conversation manager
         conversation_manager = ConversationManager()
-        conversation_managers[session_id] = conversation_manager
-        
+
         # Create call record in database
+        now = datetime.now()
         call = Call(
             customer_name=customer_name,
             agent_name=agent_name,
             status='in_progress',
-            start_time=datetime.now().isoformat(),
+            start_time=now.isoformat(),
             language=language
         )
         call_id = db_manager.create_call(call)
-        
-        # Store call info
-        active_calls[session_id] = {
-            'call_id': call_id,
-            'customer_name': customer_name,
-            'agent_name': agent_name,
-            'language': language,
-            'text_mode': text_mode,
-            'start_time': datetime.now(),
-            'status': 'in_progress'
-        }
-        
+        _invalidate_dashboard_cache()
+
+        # Store the session record
+        session = Session(
+            call_id=call_id,
+            customer_name=customer_name,
+            agent_name=agent_name,
+            language=language,
+            text_mode=text_mode,
+            start_time=now,
+            status='in_progress',
+            speech_engine=speech_engine,
+            conversation=conversation_manager
+        )
+        with sessions_lock:
+            sessions[session_id] = session
+
+        # Green relay for anything the recognizer hears on this session
+        socketio.start_background_task(_pump_recognized_speech,
+                                       session_id, session)
+
         # Start conversation
         conversation_manager.start_call(customer_name, agent_name, language)
         
@@ -312,11 +514,7 @@ def handle_start_call(data):
             })
             
             # Speak the greeting (always try to speak, regardless of text mode)
-            threading.Thread(
-                target=speech_engine.speak,
-                args=(greeting,),
-                daemon=True
-            ).start()
+            submit_tts(session, greeting)
         
         # Update call status
         emit('call_status', {'active': True})
@@ -332,42 +530,49 @@ def handle_end_call(data=None):
     """Handle end call request"""
     end_call_internal(request.sid)
 
-def end_call_internal(session_id):
+def end_call_internal(session_id, notify=True):
     """Internal function to end a call"""
     try:
-        if session_id not in active_calls:
+        with sessions_lock:
+            session = sessions.pop(session_id, None)
+        if session is None:
             return
-        
-        call_info = active_calls[session_id]
-        call_id = call_info['call_id']
-        
+
         # Calculate duration
-        duration = int((datetime.now() - call_info['start_time']).total_seconds())
-        
-        # Update database
-        updates = {
+        now = datetime.now()
+        duration = int((now - session.start_time).total_seconds())
+
+        # Queue the final call update alongside any pending transcripts,
+        # then wait for the writer to flush — near-simultaneous hang-ups
+        # land in one bulk UPDATE
+        final_update = {
+            'id': session.call_id,
             'status': 'completed',
-            'end_time': datetime.now().isoformat(),
+            'end_time': now.isoformat(),
             'duration': duration
         }
-        db_manager.update_call(call_id, updates)
-        
-        # Clean up resources
-        if session_id in speech_engines:
-            speech_engines[session_id].cleanup()
-            del speech_engines[session_id]
-        
-        if session_id in conversation_managers:
-            del conversation_managers[session_id]
-        
-        del active_calls[session_id]
-        
-        # Notify client
-        socketio.emit('call_status', {'active': False}, room=session_id)
-        socketio.emit('agent_message', {
-            'message': 'Call ended. Thank you for your time!',
-            'state': 'ended'
-        }, room=session_id)
+        # Details gathered during the conversation ride along as an
+        # orjson-encoded BLOB (encoding happens in the database layer)
+        customer_data = session.conversation.get_customer_data()
+        if customer_data:
+            final_update['customer_data'] = customer_data
+        write_queue.put(final_update)
+        write_queue.join()
+        _invalidate_dashboard_cache()
+
+        # Clean up resources on a native thread (stop_listening joins the
+        # capture thread) and release the recognition pump
+        tpool.execute(session.speech_engine.cleanup)
+        session.speech_queue.put(None)
+        
+        # Notify client; callers are socket handlers for this same sid, so
+        # plain emit targets the caller without a room-membership lookup
+        if notify:
+            emit('call_status', {'active': False})
+            emit('agent_message', {
+                'message': 'Call ended. Thank you for your time!',
+                'state': 'ended'
+            })
         
         print(f"Call ended for session {session_id}")
         
@@ -381,59 +586,44 @@ def handle_user_message(data):
         session_id = request.sid
         message = data.get('message', '').strip()
         
-        if not message or session_id not in active_calls:
+        if not message or (session := sessions.get(session_id)) is None:
             return
-        
-        # Save transcript to database
-        call_info = active_calls[session_id]
-        call_id = call_info['call_id']
-        
-        transcript = Transcript(
-            call_id=call_id,
+
+        # One timestamp per event, shared by the customer and agent lines
+        ts = datetime.now().isoformat()
+
+        # Collect the turn's transcripts and queue them together so the
+        # customer line and agent reply land in the same transaction
+        turn_transcripts = [Transcript(
+            call_id=session.call_id,
             speaker='customer',
             message=message,
-            timestamp=datetime.now().isoformat()
-        )
-        db_manager.add_transcript(transcript)
-        
+            timestamp=ts
+        )]
+
         # Process message through conversation manager
-        if session_id in conversation_managers:
-            conversation_manager = conversation_managers[session_id]
-            response = conversation_manager.process_user_input(message)
-            
-            if response:
-                # Save agent response to database
-                agent_transcript = Transcript(
-                    call_id=call_id,
-                    speaker='agent',
-                    message=response['message'],
-                    timestamp=datetime.now().isoformat()
-                )
-                db_manager.add_transcript(agent_transcript)
-                
-                # Send response to client
-                emit('agent_message', {
-                    'message': response['message'],
-                    'state': response.get('state', 'conversation')
-                })
-                
-                # Speak response if not in text mode
-                call_info = active_calls[session_id]
-                if not call_info.get('text_mode', False) and session_id in speech_engines:
-                    threading.Thread(
-                        target=speech_engines[session_id].speak,
-                        args=(response['message'],),
-                        daemon=True
-                    ).start()
-                elif call_info.get('text_mode', False):
-                    # Even in text mode, try to speak the message
-                    if session_id in speech_engines:
-                        threading.Thread(
-                            target=speech_engines[session_id].speak,
-                            args=(response['message'],),
-                            daemon=True
-                        ).start()
-        
+        response = session.conversation.process_user_input(message)
+
+        if response:
+            # Save agent response to database
+            turn_transcripts.append(Transcript(
+                call_id=session.call_id,
+                speaker='agent',
+                message=response['message'],
+                timestamp=ts
+            ))
+
+            # Send response to client
+            emit('agent_message', {
+                'message': response['message'],
+                'state': response.get('state', 'conversation')
+            })
+
+            # Speak the response (always, regardless of text mode)
+            submit_tts(session, response['message'])
+
+        write_queue.put(turn_transcripts)
+
     except Exception as e:
         print(f"Error processing user message: {e}")
         emit('error', {'message': f'Failed to process message: {str(e)}'})
@@ -444,22 +634,18 @@ def handle_start_listening():
     try:
         session_id = request.sid
         
-        if session_id not in speech_engines or session_id not in active_calls:
+        if (session := sessions.get(session_id)) is None:
             emit('error', {'message': 'Speech engine not available'})
             return
-        
-        speech_engine = speech_engines[session_id]
-        call_info = active_calls[session_id]
-        
-        def speech_callback(text):
-            if text:
-                # Process the recognized speech as a user message
-                socketio.emit('user_message', {'message': text}, room=session_id)
-        
-        # Start listening
-        speech_engine.start_listening(
-            callback=speech_callback,
-            language=call_info['language'],
+
+        # Start listening on a native thread (calibration blocks in
+        # PortAudio); recognized text flows through the session's speech
+        # queue to the green pump, never straight into socketio from the
+        # engine's OS threads
+        tpool.execute(
+            session.speech_engine.start_listening,
+            callback=session.speech_queue.put,
+            language=session.language,
             continuous=False
         )
         
@@ -476,8 +662,9 @@ def handle_stop_listening():
     try:
         session_id = request.sid
         
-        if session_id in speech_engines:
-            speech_engines[session_id].stop_listening()
+        if (session := sessions.get(session_id)) is not None:
+            # Joins the capture thread, so cross into tpool
+            tpool.execute(session.speech_engine.stop_listening)
             emit('listening_status', {'listening': False})
             print(f"Stopped listening for session {session_id}")
         
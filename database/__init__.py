@@ -1,10 +1,15 @@
-# In database/__init__.py
-
-# Make the correct models and init function available when 'database' is imported
-from .models import init_db, Call, CallTranscript
+# Single public surface for the database package: the SQLAlchemy engine and
+# table metadata live in models, the app-facing manager and its record types
+# in db_manager. Both sides describe the same tables and share one file.
+from .models import engine, SessionLocal, init_db, CallTranscript
+from .db_manager import DatabaseManager, Call, Transcript
 
 __all__ = [
+    'engine',
+    'SessionLocal',
     'init_db',
+    'CallTranscript',
+    'DatabaseManager',
     'Call',
-    'CallTranscript'
+    'Transcript'
 ]
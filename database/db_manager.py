@@ -0,0 +1,733 @@
+#!/usr/bin/env python3
+"""
+RupeeQ AI Calling Agent - Database Manager
+SQLite persistence for calls and transcripts used by the Flask app
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+import logging
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from datetime import date as _date, timedelta
+from typing import Dict, List, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+try:
+    # orjson emits bytes directly, skipping the str round trip
+    from orjson import dumps as _json_dumps, loads as _json_loads
+except ImportError:  # orjson is pinned in requirements; degrade quietly
+    import json as _stdlib_json
+
+    def _json_dumps(obj) -> bytes:
+        return _stdlib_json.dumps(obj, separators=(',', ':')).encode()
+
+    _json_loads = _stdlib_json.loads
+
+# Keep in sync with DATABASE_URL in database/models.py
+DATABASE_PATH = os.getenv("DATABASE_PATH", "rupeeq_ai_agent.db")
+
+# Columns that update_call is allowed to touch
+_CALL_COLUMNS = frozenset({
+    'customer_name', 'agent_name', 'phone_number', 'status', 'outcome',
+    'sentiment_score', 'start_time', 'end_time', 'duration', 'language',
+    'customer_data'
+})
+
+def _encode_customer_data(value):
+    """Encode a customer_data dict to its BLOB form (bytes pass through)"""
+    if value is None or isinstance(value, (bytes, memoryview)):
+        return value
+    return _json_dumps(value)
+
+# Read connections kept warm between requests
+_READ_POOL_SIZE = 4
+
+# How long today's cached statistics stay fresh; finished days never
+# change, so their entries live until cleanup touches them
+_STATS_CACHE_TTL = 5.0
+
+@dataclass
+class Call:
+    """A single outbound call record
+
+    Field order mirrors the calls table so rows hydrate positionally.
+    """
+    id: Optional[int] = None
+    customer_name: str = ''
+    agent_name: str = ''
+    phone_number: str = ''
+    status: str = 'in_progress'
+    outcome: Optional[str] = None
+    sentiment_score: Optional[float] = None
+    start_time: Optional[str] = None
+    end_time: Optional[str] = None
+    duration: Optional[int] = None
+    language: str = 'en-IN'
+    customer_data: Optional[Any] = None
+
+    def customer_data_dict(self) -> Dict[str, Any]:
+        """Decode the customer_data BLOB lazily, caching the dict"""
+        if isinstance(self.customer_data, (bytes, memoryview)):
+            self.customer_data = _json_loads(bytes(self.customer_data))
+        return self.customer_data or {}
+
+@dataclass
+class Transcript:
+    """One spoken line within a call
+
+    Field order mirrors the call_transcripts table so rows hydrate
+    positionally.
+    """
+    id: Optional[int] = None
+    call_id: int = 0
+    speaker: str = ''
+    message: str = ''
+    timestamp: Optional[str] = None
+
+
+# Outcomes with dedicated counters in the statistics queries
+_KNOWN_OUTCOMES = ('interested', 'not_interested', 'call_back', 'dnc',
+                   'unknown')
+
+# Static SQL hoisted to module level: passing the same string object lets
+# the sqlite3 driver reuse its cached prepared statement
+_SQL_INSERT_CALL = '''
+    INSERT INTO calls (customer_name, agent_name, phone_number,
+                       status, outcome, sentiment_score,
+                       start_time, end_time, duration, language,
+                       customer_data)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+_SQL_INSERT_TRANSCRIPT = '''
+    INSERT INTO call_transcripts (call_id, speaker, message, timestamp)
+    VALUES (?, ?, ?, ?)
+'''
+
+_SQL_GET_CALL = 'SELECT * FROM calls WHERE id = ?'
+
+_SQL_GET_TRANSCRIPTS = '''
+    SELECT * FROM call_transcripts
+    WHERE call_id = ? ORDER BY id
+'''
+
+_SQL_SEARCH_FTS = '''
+    SELECT t.* FROM transcripts_fts f
+    JOIN call_transcripts t ON t.id = f.rowid
+    WHERE transcripts_fts MATCH ?
+    ORDER BY rank LIMIT ?
+'''
+
+_SQL_SEARCH_LIKE = '''
+    SELECT * FROM call_transcripts
+    WHERE message LIKE ? ORDER BY id DESC LIMIT ?
+'''
+
+_COUNTER_COLUMNS = ('total_calls', 'connected_calls', 'not_connected',
+                    'busy', 'failed', 'duration_n', 'duration_sum',
+                    *_KNOWN_OUTCOMES)
+
+_SQL_COUNTERS_READ = '''
+    SELECT total_calls, connected_calls, not_connected, busy, failed,
+           CAST(duration_sum AS REAL) / NULLIF(duration_n, 0) AS avg_duration,
+           CAST(connected_calls AS REAL) * 100.0
+               / NULLIF(total_calls, 0) AS connection_rate,
+           {}
+    FROM daily_counters WHERE day = ?
+'''.format(', '.join(_KNOWN_OUTCOMES))
+
+def _counter_delta(row_ref: str, sign: str) -> str:
+    """SET clause applying one call's +/- contribution to its day row
+
+    IS comparisons instead of = keep NULL outcomes from poisoning the
+    arithmetic (NULL = x yields NULL, NULL IS x yields 0).
+    """
+    parts = [
+        f"total_calls = total_calls {sign} 1",
+        f"connected_calls = connected_calls {sign} ({row_ref}.status IS 'completed')",
+        f"not_connected = not_connected {sign} ({row_ref}.status IS 'not_connected')",
+        f"busy = busy {sign} ({row_ref}.status IS 'busy')",
+        f"failed = failed {sign} ({row_ref}.status IS 'failed')",
+        f"duration_n = duration_n {sign} ({row_ref}.duration IS NOT NULL)",
+        f"duration_sum = duration_sum {sign} COALESCE({row_ref}.duration, 0)",
+    ]
+    parts += [f"{o} = {o} {sign} ({row_ref}.outcome IS '{o}')"
+              for o in _KNOWN_OUTCOMES]
+    return ', '.join(parts)
+
+_SQL_RECENT_CALL_SUMMARIES = '''
+    SELECT id, customer_name, status, outcome, sentiment_score,
+           start_time, duration
+    FROM calls ORDER BY start_time DESC LIMIT ?
+'''
+
+@lru_cache(maxsize=64)
+def _update_call_sql(fields: tuple) -> str:
+    """Memoized UPDATE statement for a given ordered field set"""
+    assignments = ', '.join(f'{column} = ?' for column in fields)
+    return f'UPDATE calls SET {assignments} WHERE id = ?'
+
+class DatabaseManager:
+    """Manages SQLite storage for calls and transcripts
+
+    Connections follow SQLite's natural shape: one long-lived write
+    connection guarded by a lock, plus a small pool of read-only
+    connections, so no request pays a file open per query.
+    """
+
+    def __init__(self, db_path: str = DATABASE_PATH):
+        self.db_path = db_path
+        self.init_database()
+        self._write_lock = threading.Lock()
+        self._write_conn = self._new_connection()
+        self._readers: queue.Queue = queue.Queue(maxsize=_READ_POOL_SIZE)
+        # day -> (monotonic expiry, statistics dict)
+        self._stats_cache: Dict[str, tuple] = {}
+
+    def _new_connection(self, readonly: bool = False) -> sqlite3.Connection:
+        """Open a connection with pragmas and row factory applied"""
+        # isolation_level=None turns off the sqlite3 module's implicit
+        # transactions: reads run without BEGIN/END bookkeeping and writes
+        # manage their own explicit transactions via _write_txn
+        if readonly:
+            conn = sqlite3.connect(f'file:{self.db_path}?mode=ro', uri=True,
+                                   check_same_thread=False,
+                                   isolation_level=None,
+                                   cached_statements=256)
+        else:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                                   isolation_level=None,
+                                   cached_statements=256)
+        conn.row_factory = sqlite3.Row
+        self._apply_pragmas(conn, readonly=readonly)
+        return conn
+
+    @staticmethod
+    def _apply_pragmas(conn: sqlite3.Connection, readonly: bool = False):
+        """Set performance pragmas; run on every connection since all but
+        journal_mode are per-connection settings"""
+        if not readonly:
+            if os.environ.get('VERCEL'):
+                # Ephemeral tmpfs: WAL's -wal/-shm sidecar files buy nothing
+                conn.execute('PRAGMA journal_mode=MEMORY')
+            else:
+                # WAL + NORMAL: readers proceed during writes, one fsync/commit
+                conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA cache_size=-64000')
+        conn.execute('PRAGMA mmap_size=268435456')
+        # Off by default per connection; without it ON DELETE CASCADE is a no-op
+        conn.execute('PRAGMA foreign_keys=ON')
+
+    @contextmanager
+    def _acquire(self, readonly: bool = False):
+        """Hand out a pooled connection: the shared writer under its lock,
+        or a read-only connection from (or grown into) the reader pool"""
+        if not readonly:
+            with self._write_lock:
+                yield self._write_conn
+            return
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            conn = self._new_connection(readonly=True)
+        try:
+            yield conn
+        finally:
+            try:
+                self._readers.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    @contextmanager
+    def _write_txn(self):
+        """Writer connection wrapped in an explicit BEGIN IMMEDIATE
+
+        Taking the write lock up front turns lock-upgrade SQLITE_BUSY races
+        into clean waits.
+        """
+        with self._acquire() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+
+    def close(self):
+        """Close all pooled connections"""
+        with self._write_lock:
+            # Let SQLite refresh whatever index statistics went stale
+            # during this process's lifetime; analysis_limit keeps the
+            # pass bounded
+            try:
+                self._write_conn.execute('PRAGMA analysis_limit=1000')
+                self._write_conn.execute('PRAGMA optimize')
+            except sqlite3.Error:
+                pass
+            self._write_conn.close()
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def init_database(self):
+        """Create tables if they do not exist"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            self._apply_pragmas(conn)
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS calls (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    customer_name TEXT NOT NULL,
+                    agent_name TEXT,
+                    phone_number TEXT,
+                    status TEXT DEFAULT 'in_progress',
+                    outcome TEXT,
+                    sentiment_score REAL,
+                    start_time TEXT,
+                    end_time TEXT,
+                    duration INTEGER,
+                    language TEXT DEFAULT 'en-IN',
+                    customer_data BLOB
+                )
+            ''')
+            # Databases created before the column existed
+            call_columns = {r[1] for r in
+                            conn.execute('PRAGMA table_info(calls)')}
+            if 'customer_data' not in call_columns:
+                conn.execute('ALTER TABLE calls ADD COLUMN customer_data BLOB')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS call_transcripts (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    call_id INTEGER NOT NULL
+                        REFERENCES calls(id) ON DELETE CASCADE,
+                    speaker TEXT NOT NULL,
+                    message TEXT NOT NULL,
+                    timestamp TEXT
+                )
+            ''')
+            # Full-text index over transcript messages (external-content
+            # pattern: FTS5 stores only the inverted index, triggers keep it
+            # in sync with call_transcripts)
+            try:
+                conn.execute('''
+                    CREATE VIRTUAL TABLE IF NOT EXISTS transcripts_fts
+                    USING fts5(message, content='call_transcripts',
+                               content_rowid='id',
+                               tokenize='porter unicode61')
+                ''')
+                conn.execute('''
+                    CREATE TRIGGER IF NOT EXISTS call_transcripts_fts_ai
+                    AFTER INSERT ON call_transcripts BEGIN
+                        INSERT INTO transcripts_fts(rowid, message)
+                        VALUES (new.id, new.message);
+                    END
+                ''')
+                conn.execute('''
+                    CREATE TRIGGER IF NOT EXISTS call_transcripts_fts_ad
+                    AFTER DELETE ON call_transcripts BEGIN
+                        INSERT INTO transcripts_fts(transcripts_fts, rowid, message)
+                        VALUES ('delete', old.id, old.message);
+                    END
+                ''')
+                conn.execute('''
+                    CREATE TRIGGER IF NOT EXISTS call_transcripts_fts_au
+                    AFTER UPDATE ON call_transcripts BEGIN
+                        INSERT INTO transcripts_fts(transcripts_fts, rowid, message)
+                        VALUES ('delete', old.id, old.message);
+                        INSERT INTO transcripts_fts(rowid, message)
+                        VALUES (new.id, new.message);
+                    END
+                ''')
+                self._fts_enabled = True
+            except sqlite3.OperationalError:
+                logger.warning(
+                    'FTS5 unavailable; transcript search falls back to LIKE')
+                self._fts_enabled = False
+            # Incrementally maintained per-day counters: triggers fold each
+            # calls write into its day row, so daily statistics become a
+            # single-row read instead of an aggregate scan
+            counters_exist = conn.execute('''
+                SELECT 1 FROM sqlite_master
+                WHERE type = 'table' AND name = 'daily_counters'
+            ''').fetchone()
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS daily_counters (
+                    day TEXT PRIMARY KEY NOT NULL,
+                    {}
+                )
+            '''.format(',\n                    '.join(
+                f'{c} INTEGER NOT NULL DEFAULT 0' for c in _COUNTER_COLUMNS)))
+            if not counters_exist:
+                conn.execute('''
+                    INSERT INTO daily_counters
+                    SELECT substr(start_time, 1, 10) AS day,
+                           COUNT(*),
+                           SUM(status IS 'completed'),
+                           SUM(status IS 'not_connected'),
+                           SUM(status IS 'busy'),
+                           SUM(status IS 'failed'),
+                           COUNT(duration),
+                           COALESCE(SUM(duration), 0),
+                           {}
+                    FROM calls
+                    WHERE start_time IS NOT NULL
+                    GROUP BY day
+                '''.format(', '.join(f"SUM(outcome IS '{o}')"
+                                     for o in _KNOWN_OUTCOMES)))
+            # A NULL start_time has no day row: the WHEN guards keep the
+            # triggers from upserting junk NULL-day rows (NULL never
+            # conflicts in ON CONFLICT(day)). Drop-and-create so databases
+            # carrying the old unguarded definitions pick these up, and
+            # sweep any junk rows the old triggers left behind.
+            conn.execute('DELETE FROM daily_counters WHERE day IS NULL')
+            conn.execute('DROP TRIGGER IF EXISTS calls_counters_ai')
+            conn.execute('DROP TRIGGER IF EXISTS calls_counters_au')
+            conn.execute('DROP TRIGGER IF EXISTS calls_counters_ad')
+            conn.execute(f'''
+                CREATE TRIGGER calls_counters_ai
+                AFTER INSERT ON calls
+                WHEN new.start_time IS NOT NULL BEGIN
+                    INSERT INTO daily_counters (day)
+                    VALUES (substr(new.start_time, 1, 10))
+                    ON CONFLICT(day) DO NOTHING;
+                    UPDATE daily_counters
+                    SET {_counter_delta('new', '+')}
+                    WHERE day = substr(new.start_time, 1, 10);
+                END
+            ''')
+            # The update trigger guards its INSERT separately: a call can
+            # move between a NULL and a real start_time in either direction
+            conn.execute(f'''
+                CREATE TRIGGER calls_counters_au
+                AFTER UPDATE ON calls
+                WHEN new.start_time IS NOT NULL
+                     OR old.start_time IS NOT NULL BEGIN
+                    UPDATE daily_counters
+                    SET {_counter_delta('old', '-')}
+                    WHERE day = substr(old.start_time, 1, 10);
+                    INSERT INTO daily_counters (day)
+                    SELECT substr(new.start_time, 1, 10)
+                    WHERE new.start_time IS NOT NULL
+                    ON CONFLICT(day) DO NOTHING;
+                    UPDATE daily_counters
+                    SET {_counter_delta('new', '+')}
+                    WHERE day = substr(new.start_time, 1, 10);
+                END
+            ''')
+            conn.execute(f'''
+                CREATE TRIGGER calls_counters_ad
+                AFTER DELETE ON calls
+                WHEN old.start_time IS NOT NULL BEGIN
+                    UPDATE daily_counters
+                    SET {_counter_delta('old', '-')}
+                    WHERE day = substr(old.start_time, 1, 10);
+                END
+            ''')
+            # Indexes for the hot WHERE/ORDER BY shapes (mirrors the
+            # declarations in models.py; this is the init path that runs)
+            conn.execute('''CREATE INDEX IF NOT EXISTS ix_calls_starttime_desc
+                            ON calls(start_time DESC)''')
+            conn.execute('''CREATE INDEX IF NOT EXISTS ix_calls_status_starttime
+                            ON calls(status, start_time DESC)''')
+            conn.execute('''CREATE INDEX IF NOT EXISTS ix_calls_outcome_starttime
+                            ON calls(outcome, start_time DESC)''')
+            conn.execute('''CREATE INDEX IF NOT EXISTS ix_transcripts_call_ts
+                            ON call_transcripts(call_id, timestamp)''')
+            conn.commit()
+            # Seed/refresh planner statistics at startup so index choices
+            # reflect actual data shape from the first query on
+            conn.execute('PRAGMA analysis_limit=1000')
+            conn.execute('PRAGMA optimize')
+        finally:
+            conn.close()
+
+    def _invalidate_stats_cache(self):
+        """Drop today's cached statistics after a write; historical days
+        only change via cleanup, which clears the whole cache"""
+        self._stats_cache.pop(_date.today().isoformat(), None)
+
+    # Call operations
+
+    def create_call(self, call: Call) -> int:
+        """Insert a new call record and return its id"""
+        with self._write_txn() as conn:
+            cursor = conn.execute(_SQL_INSERT_CALL,
+                (call.customer_name, call.agent_name, call.phone_number,
+                  call.status, call.outcome, call.sentiment_score,
+                  call.start_time, call.end_time, call.duration, call.language,
+                  _encode_customer_data(call.customer_data)))
+            call_id = cursor.lastrowid
+        self._invalidate_stats_cache()
+        return call_id
+
+    def create_calls_bulk(self, calls: List[Call]) -> List[int]:
+        """Insert many call records with one executemany/commit, returning ids"""
+        if not calls:
+            return []
+        rows = [(c.customer_name, c.agent_name, c.phone_number, c.status,
+                 c.outcome, c.sentiment_score, c.start_time, c.end_time,
+                 c.duration, c.language,
+                 _encode_customer_data(c.customer_data)) for c in calls]
+        with self._write_txn() as conn:
+            conn.executemany(_SQL_INSERT_CALL, rows)
+            last = conn.execute('SELECT last_insert_rowid()').fetchone()[0]
+        self._invalidate_stats_cache()
+        return list(range(last - len(rows) + 1, last + 1))
+
+    def update_call(self, call_id: int, updates: Dict[str, Any]):
+        """Update fields on an existing call record"""
+        fields = {k: v for k, v in updates.items() if k in _CALL_COLUMNS}
+        if not fields:
+            return
+        if 'customer_data' in fields:
+            fields['customer_data'] = _encode_customer_data(
+                fields['customer_data'])
+        with self._write_txn() as conn:
+            conn.execute(_update_call_sql(tuple(fields)),
+                         (*fields.values(), call_id))
+        self._invalidate_stats_cache()
+
+    def update_calls_bulk(self, updates: List[Dict[str, Any]]):
+        """Apply many call updates (each dict carries an 'id') in one transaction
+
+        Updates with the same field set share a prepared statement via
+        executemany, so a burst of simultaneous hang-ups becomes one
+        statement instead of one UPDATE round trip per call.
+        """
+        if not updates:
+            return
+        grouped: Dict[tuple, List[Dict[str, Any]]] = defaultdict(list)
+        for update in updates:
+            fields = tuple(sorted(k for k in update if k in _CALL_COLUMNS))
+            if fields and 'id' in update:
+                grouped[fields].append(update)
+        if not grouped:
+            return
+        with self._write_txn() as conn:
+            for fields, group in grouped.items():
+                conn.executemany(
+                    _update_call_sql(fields),
+                    [tuple(_encode_customer_data(u[column])
+                           if column == 'customer_data' else u[column]
+                           for column in fields) + (u['id'],)
+                     for u in group])
+        self._invalidate_stats_cache()
+
+    def get_call(self, call_id: int) -> Optional[Call]:
+        """Fetch a single call by id"""
+        with self._acquire(readonly=True) as conn:
+            row = conn.execute(_SQL_GET_CALL, (call_id,)).fetchone()
+        return Call(*row) if row else None
+
+    def get_calls(self, filters: Optional[Dict[str, Any]] = None,
+                  limit: int = 50) -> List[Call]:
+        """Fetch calls matching the given filters, most recent first"""
+        query = 'SELECT * FROM calls WHERE 1=1'
+        params = []
+        filters = filters or {}
+
+        # Half-open ranges on the raw ISO column keep start_time indexes
+        # usable; DATE(start_time) would force a full scan
+        if filters.get('start_date'):
+            query += ' AND start_time >= ?'
+            params.append(filters['start_date'])
+        if filters.get('end_date'):
+            query += ' AND start_time < ?'
+            next_day = _date.fromisoformat(filters['end_date']) + timedelta(days=1)
+            params.append(next_day.isoformat())
+        if filters.get('status'):
+            query += ' AND status = ?'
+            params.append(filters['status'])
+        if filters.get('outcome'):
+            query += ' AND outcome = ?'
+            params.append(filters['outcome'])
+
+        query += ' ORDER BY start_time DESC LIMIT ?'
+        params.append(limit)
+
+        with self._acquire(readonly=True) as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [Call(*row) for row in rows]
+
+    def get_calls_summary(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Recent calls projected to the dashboard columns, most recent first
+
+        Narrower than get_calls: only the listed columns leave SQLite.
+        Returns dicts rather than Call objects because positional
+        hydration requires the full column order.
+        """
+        with self._acquire(readonly=True) as conn:
+            rows = conn.execute(_SQL_RECENT_CALL_SUMMARIES,
+                                (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+    # Transcript operations
+
+    def add_transcript(self, transcript: Transcript) -> int:
+        """Insert a transcript line and return its id"""
+        with self._write_txn() as conn:
+            cursor = conn.execute(_SQL_INSERT_TRANSCRIPT,
+                (transcript.call_id, transcript.speaker,
+                 transcript.message, transcript.timestamp))
+            return cursor.lastrowid
+
+    def add_transcripts(self, transcripts: List[Transcript]) -> List[int]:
+        """Insert a batch of transcript lines with one executemany/commit
+
+        Returns the assigned ids; rowids from a single executemany are
+        contiguous because the write lock keeps other writers out.
+        """
+        if not transcripts:
+            return []
+        rows = [(t.call_id, t.speaker, t.message, t.timestamp)
+                for t in transcripts]
+        with self._write_txn() as conn:
+            conn.executemany(_SQL_INSERT_TRANSCRIPT, rows)
+            last = conn.execute('SELECT last_insert_rowid()').fetchone()[0]
+        return list(range(last - len(rows) + 1, last + 1))
+
+    def get_transcripts(self, call_id: int) -> List[Transcript]:
+        """Fetch all transcript lines for a call in order"""
+        with self._acquire(readonly=True) as conn:
+            rows = conn.execute(_SQL_GET_TRANSCRIPTS, (call_id,)).fetchall()
+        return [Transcript(*row) for row in rows]
+
+    def get_transcripts_for_calls(self, call_ids) -> Dict[int, List[Transcript]]:
+        """Fetch transcripts for many calls in one IN-query, grouped by call"""
+        grouped: Dict[int, List[Transcript]] = defaultdict(list)
+        if not call_ids:
+            return grouped
+        placeholders = ', '.join('?' * len(call_ids))
+        with self._acquire(readonly=True) as conn:
+            rows = conn.execute(f'''
+                SELECT * FROM call_transcripts
+                WHERE call_id IN ({placeholders}) ORDER BY id
+            ''', tuple(call_ids)).fetchall()
+        for row in rows:
+            grouped[row['call_id']].append(Transcript(*row))
+        return grouped
+
+    def get_last_messages(self, call_ids) -> Dict[int, str]:
+        """Latest transcript message per call in one grouped projection
+
+        MAX(id) with a bare message column uses SQLite's guarantee that
+        bare columns come from the max row of each group.
+        """
+        if not call_ids:
+            return {}
+        placeholders = ', '.join('?' * len(call_ids))
+        with self._acquire(readonly=True) as conn:
+            rows = conn.execute(f'''
+                SELECT call_id, message, MAX(id)
+                FROM call_transcripts
+                WHERE call_id IN ({placeholders})
+                GROUP BY call_id
+            ''', tuple(call_ids)).fetchall()
+        return {row['call_id']: row['message'] for row in rows}
+
+    def search_transcripts(self, keyword: str, limit: int = 50) -> List[Transcript]:
+        """Search transcript messages for a keyword via the FTS5 index"""
+        if self._fts_enabled:
+            # Quote the keyword as a phrase so user input cannot be
+            # misread as FTS5 query syntax
+            match = '"{}"'.format(keyword.replace('"', '""'))
+            with self._acquire(readonly=True) as conn:
+                rows = conn.execute(_SQL_SEARCH_FTS, (match, limit)).fetchall()
+        else:
+            with self._acquire(readonly=True) as conn:
+                rows = conn.execute(_SQL_SEARCH_LIKE,
+                                    (f'%{keyword}%', limit)).fetchall()
+        return [Transcript(*row) for row in rows]
+
+    # Statistics
+
+    def get_daily_statistics(self, date: Optional[str] = None) -> Dict[str, Any]:
+        """Get aggregate call statistics for a day (defaults to today)
+
+        Reads the trigger-maintained daily_counters row, so cost is one
+        indexed point lookup regardless of how many calls the day holds.
+        Results are cached: briefly for today (writes invalidate it too),
+        indefinitely for finished days.
+        """
+        today = _date.today().isoformat()
+        day = date or today
+        cached = self._stats_cache.get(day)
+        if cached is not None and time.monotonic() < cached[0]:
+            return cached[1]
+        with self._acquire(readonly=True) as conn:
+            row = conn.execute(_SQL_COUNTERS_READ, (day,)).fetchone()
+
+        if row is None:
+            stats = {
+                'total_calls': 0, 'connected_calls': 0, 'not_connected': 0,
+                'busy': 0, 'failed': 0, 'avg_duration': 0,
+                'connection_rate': 0.0, 'outcome_counts': {}
+            }
+        else:
+            stats = {
+                'total_calls': row['total_calls'],
+                'connected_calls': row['connected_calls'],
+                'not_connected': row['not_connected'],
+                'busy': row['busy'],
+                'failed': row['failed'],
+                'avg_duration': round(row['avg_duration'] or 0, 1),
+                'connection_rate': round(row['connection_rate'] or 0.0, 1),
+                'outcome_counts': {o: row[o] for o in _KNOWN_OUTCOMES
+                                   if row[o]}
+            }
+        expires = time.monotonic() + _STATS_CACHE_TTL \
+            if day == today else float('inf')
+        self._stats_cache[day] = (expires, stats)
+        return stats
+
+    def get_dashboard_bundle(self, limit: int = 10) -> Dict[str, Any]:
+        """Fetch today's statistics and the recent-call list
+
+        Statistics come from the daily_counters point lookup; the
+        recent-call listing reads only the dashboard's columns.
+        """
+        return {
+            'statistics': self.get_daily_statistics(),
+            'recent_calls': self.get_calls_summary(limit)
+        }
+
+    # Maintenance
+
+    def cleanup_old_data(self, days: int = 90):
+        """Delete calls and transcripts older than the retention window"""
+        cutoff = (_date.today() - timedelta(days=days)).isoformat()
+        with self._acquire() as conn:
+            # Transcripts go with their calls via ON DELETE CASCADE; the
+            # orphan sweep covers rows created before the FK existed
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.execute('DELETE FROM calls WHERE start_time < ?', (cutoff,))
+                conn.execute('''
+                    DELETE FROM call_transcripts
+                    WHERE call_id NOT IN (SELECT id FROM calls)
+                ''')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+            # Retention deletes touch historical days too
+            self._stats_cache.clear()
+            # Fold the WAL back into the main file so it doesn't grow
+            # unbounded after bulk deletes
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            # Bulk deletes skew the planner's row estimates; rebuild them
+            # while the table is at its new size
+            conn.execute('PRAGMA analysis_limit=1000')
+            conn.execute('ANALYZE')
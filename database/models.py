@@ -1,85 +1,79 @@
-# In database/models.py
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Float, Enum, Text
+from sqlalchemy import create_engine, event, Column, Integer, String, Float, Text, LargeBinary, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-import datetime
-import enum
+from sqlalchemy.pool import QueuePool
 import os
 
 # Use an environment variable for the database URL for Vercel compatibility
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///rupeeq_ai_agent.db")
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
+# SQLite is effectively one writer + a few readers: keep a single pooled
+# connection with limited overflow so requests reuse handles instead of
+# paying a file open per query
+engine = create_engine(
+    DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=QueuePool,
+    pool_size=1,
+    max_overflow=8,
+)
 
-class CallStatus(enum.Enum):
-    in_progress = "in_progress"
-    completed = "completed"
-    failed = "failed"
-    busy = "busy"
-    not_connected = "not_connected"
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL + synchronous=NORMAL lets readers proceed while a write is in
+    # flight (one writer + N readers), and busy_timeout avoids SQLITE_BUSY
+    # errors when the writer briefly holds the lock
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.execute("PRAGMA cache_size=-65536")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
 
-class CallOutcome(enum.Enum):
-    interested = "interested"
-    not_interested = "not_interested"
-    call_back = "call_back"
-    dnc = "dnc"
-    unknown = "unknown"
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+Base = declarative_base()
 
 class Call(Base):
+    """SQLAlchemy mapping of the calls table written by DatabaseManager
+
+    Timestamps are stored as ISO-8601 text so lexicographic comparisons
+    match chronological order in range filters.
+    """
     __tablename__ = 'calls'
-    
+
     id = Column(Integer, primary_key=True, index=True)
-    call_id = Column(String, unique=True, index=True, nullable=False)
     customer_name = Column(String, nullable=False)
-    status = Column(Enum(CallStatus), default=CallStatus.in_progress)
-    outcome = Column(Enum(CallOutcome), default=CallOutcome.unknown)
-    start_time = Column(DateTime, default=datetime.datetime.now)
-    end_time = Column(DateTime, nullable=True)
-    duration = Column(Integer, nullable=True) # <-- SYNTAX ERROR FIXED
+    agent_name = Column(String)
+    phone_number = Column(String)
+    status = Column(String, default='in_progress')
+    outcome = Column(String, nullable=True)
     sentiment_score = Column(Float, nullable=True)
-    call_type = Column(String, default='ai_agent')
-    
-    def save(self):
-        db = SessionLocal()
-        try:
-            db.add(self)
-            db.commit()
-            db.refresh(self)
-        finally:
-            db.close()
-
-    # NOTE: These are placeholder methods. You must add your own database query logic.
-    @staticmethod
-    def get_recent_calls(limit=50): return []
-    @staticmethod
-    def get_calls_today(): return {'total_calls': 0, 'status_counts': {}, 'avg_duration': 0, 'avg_sentiment': 0, 'outcome_counts': {}}
-    @staticmethod
-    def get_filtered_calls(filters): return []
-    @staticmethod
-    def get_call_by_id(call_id): return None
+    start_time = Column(String, nullable=True)
+    end_time = Column(String, nullable=True)
+    duration = Column(Integer, nullable=True)
+    language = Column(String, default='en-IN')
+    # orjson-encoded dict of details collected during the conversation
+    customer_data = Column(LargeBinary, nullable=True)
 
 class CallTranscript(Base):
+    """SQLAlchemy mapping of the call_transcripts table"""
     __tablename__ = 'call_transcripts'
-    
+
     id = Column(Integer, primary_key=True, index=True)
-    call_id = Column(String, index=True, nullable=False)
+    call_id = Column(Integer, index=True, nullable=False)
     speaker = Column(String, nullable=False)
     message = Column(Text, nullable=False)
-    timestamp = Column(DateTime, default=datetime.datetime.now)
-
-    def save(self):
-        db = SessionLocal()
-        try:
-            db.add(self)
-            db.commit()
-            db.refresh(self)
-        finally:
-            db.close()
+    timestamp = Column(String, nullable=True)
 
-    @staticmethod
-    def get_call_transcripts(call_id): return []
+# Composite indexes covering the dashboard and export WHERE/ORDER BY
+# combinations, so recency listings and filtered exports become index range
+# scans instead of full-table scans plus a sort
+Index('ix_calls_starttime_desc', Call.start_time.desc())
+Index('ix_calls_status_starttime', Call.status, Call.start_time.desc())
+Index('ix_calls_outcome_starttime', Call.outcome, Call.start_time.desc())
+Index('ix_transcripts_call_ts', CallTranscript.call_id, CallTranscript.timestamp)
 
 def init_db():
     Base.metadata.create_all(bind=engine)
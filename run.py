@@ -1,24 +1,47 @@
 #!/usr/bin/env python3
 """
 RupeeQ AI Calling Agent Launcher
+
+Boots gunicorn with the eventlet worker class by default; set DEV=1 (or
+FLASK_ENV=development) to get the Flask dev server with debug and the
+reloader instead.
 """
 import os
-from app import app, socketio
 
 if __name__ == '__main__':
-    # Set environment variables
-    os.environ['FLASK_ENV'] = 'development'
-    os.environ['FLASK_DEBUG'] = '1'
-    
-    # Print startup message
-    print("🚀 Starting RupeeQ AI Calling Agent...")
-    print("📊 Dashboard: http://localhost:8080")
-    print("🤖 AI Agent: http://localhost:8080/ai-agent")
-    print("Press Ctrl+C to stop the server")
-    
-    # Run the application
-    socketio.run(app, 
-                 host='0.0.0.0',
-                 port=8080,
-                 debug=True,
-                 use_reloader=True)
+    dev_mode = os.environ.get('DEV') or \
+        os.environ.get('FLASK_ENV') == 'development'
+
+    if dev_mode:
+        # Set environment variables
+        os.environ['FLASK_ENV'] = 'development'
+        os.environ['FLASK_DEBUG'] = '1'
+
+        from app import app, socketio
+
+        # Print startup message
+        print("🚀 Starting RupeeQ AI Calling Agent (dev)...")
+        print("📊 Dashboard: http://localhost:8080")
+        print("🤖 AI Agent: http://localhost:8080/ai-agent")
+        print("Press Ctrl+C to stop the server")
+
+        # Run the application
+        socketio.run(app,
+                     host='0.0.0.0',
+                     port=8080,
+                     debug=True,
+                     use_reloader=True)
+    else:
+        # Flask-SocketIO supports one eventlet worker per Socket.IO node
+        # (scaling out needs a message queue, not more workers), so the
+        # default stays at 1; WEB_CONCURRENCY overrides it for pure-HTTP
+        # deployments behind a sticky load balancer
+        workers = os.environ.get('WEB_CONCURRENCY', '1')
+        os.execvp('gunicorn', [
+            'gunicorn',
+            '-k', 'eventlet',
+            '-w', workers,
+            '--bind', '0.0.0.0:8080',
+            '--reuse-port',
+            'wsgi:application',
+        ])
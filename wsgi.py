@@ -1,11 +1,13 @@
 #!/usr/bin/env python3
 """
-WSGI entry point for Vercel deployment
+WSGI entry point for gunicorn and Vercel
+(`gunicorn -k eventlet wsgi:application`)
 """
 
 from app import app
 
-# This is the WSGI application that Vercel will use
+# Flask-SocketIO wraps app.wsgi_app at init time, so serving the Flask
+# app serves Socket.IO traffic as well — no extra middleware needed
 application = app
 
 if __name__ == "__main__":